@@ -310,7 +310,7 @@ def bypass_and_download(df, transformer):
 
 def create_customer_download_section(transformed_df: pd.DataFrame):
     """Create the download section for customer CSV."""
-    download_filename = f"shopify_customers_{pd.Timestamp.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+    download_filename = generate_download_filename("shopify_customers")
     csv_data = dataframe_to_csv_string(transformed_df)
     
     st.download_button(
@@ -418,7 +418,7 @@ def process_order_file(uploaded_file):
 
 def create_order_download_section(transformed_df: pd.DataFrame):
     """Create the download section for order CSV."""
-    download_filename = f"shopify_orders_{pd.Timestamp.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+    download_filename = generate_download_filename("shopify_orders")
     csv_data = dataframe_to_csv_string(transformed_df)
     
     st.download_button(
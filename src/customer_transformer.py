@@ -2,10 +2,51 @@
 Customer data transformation module for Shopify import.
 """
 
+import numpy as np
 import pandas as pd
+import re
 from typing import Dict, Any, List
 
 
+# US zip code patterns: 12345 OR 12345-6789, plus 4-digit zips missing their leading zero
+_US_ZIP_PATTERN = re.compile(r'^\d{5}(-\d{4})?$')
+_FOUR_DIGIT_ZIP_PATTERN = re.compile(r'^\d{4}$')
+
+# Valid US state codes: the 50 states, DC, territories, freely associated states and military mail regions
+_US_STATE_CODES = frozenset({
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+    'DC', 'AS', 'GU', 'MP', 'PR', 'VI', 'UM', 'FM', 'MH', 'PW',
+    'AA', 'AE', 'AP'
+})
+
+# Closing hint appended to the invalid state code error
+_STATE_CODE_FIX_HINT = (
+    "To fix: Replace with valid 2-letter US state abbreviations. Common examples:\n"
+    "• California = CA\n• New York = NY\n• Texas = TX\n• Florida = FL\n• Illinois = IL\n• Pennsylvania = PA"
+)
+
+
+def _us_row_mask(country_codes: pd.Series) -> np.ndarray:
+    """Flag rows whose country code is 'US', case-insensitively.
+    
+    Each distinct country is uppercased once and matched by its factorize code,
+    so the per-row work is an integer lookup rather than a string comparison.
+    """
+    codes, countries = pd.factorize(country_codes)
+    is_us = pd.Index(countries).astype(str).str.upper() == 'US'
+    # Missing values factorize to code -1, which picks the appended False flag
+    return np.append(is_us, False)[codes]
+
+
+def _customer_names(first_names: np.ndarray, last_names: np.ndarray, positions: np.ndarray) -> List[str]:
+    """Format 'First Last' for the given row positions with vectorized string concatenation."""
+    return np.char.add(np.char.add(first_names[positions].astype(str), ' '), last_names[positions].astype(str)).tolist()
+
+
 class CustomerToShopifyTransformer:
     """Transforms customer data to Shopify import format."""
     
@@ -21,6 +62,7 @@ class CustomerToShopifyTransformer:
         """Validate that the DataFrame has required columns and data integrity."""
         errors = []
         fixable_zip_errors = []
+        invalid_zip_codes = set()
         
         # Check for required columns
         missing_columns = [col for col in self.required_columns if col not in df.columns]
@@ -33,105 +75,105 @@ class CustomerToShopifyTransformer:
             if empty_emails > 0:
                 errors.append(f"{empty_emails} customers have empty email addresses")
         
+        # Find US entries once; the zip and state checks only look at these rows
+        us_positions = ()
+        if 'Default Address Country Code' in df.columns:
+            us_positions = _us_row_mask(df['Default Address Country Code']).nonzero()[0]
+        
+        # Name columns fetched once as arrays, so error messages index by position instead of building row Series
+        if len(us_positions):
+            first_names = df['First Name'].to_numpy() if 'First Name' in df.columns else np.full(len(df), 'Unknown', dtype=object)
+            last_names = df['Last Name'].to_numpy() if 'Last Name' in df.columns else np.full(len(df), 'Customer', dtype=object)
+        
         # Check US zip code format (5 digits OR 5 digits + dash + 4 digits)
-        if 'Default Address Country Code' in df.columns and 'Default Address Zip' in df.columns:
-            import re
+        if len(us_positions) and 'Default Address Zip' in df.columns:
+            invalid_zips = []
+            fixable_4digit_zips = []
             
-            # Convert to string and handle nulls
-            country_codes = df['Default Address Country Code'].astype(str).str.upper()
-            zip_codes = df['Default Address Zip'].astype(str)
+            # Convert the US rows' zips to string; non-US rows are never normalized
+            zip_codes = df['Default Address Zip'].iloc[us_positions]
+            zip_strings = zip_codes.astype(str).str.strip()
             
-            # Find US entries
-            us_mask = country_codes == 'US'
-            us_customers = df[us_mask]
+            # Skip empty/null values, then match the whole column against the US format at once
+            has_zip = zip_codes.notna() & zip_strings.ne('') & zip_strings.ne('nan')
+            malformed = has_zip & ~zip_strings.str.match(_US_ZIP_PATTERN, na=False)
+            fixable = zip_strings.str.match(_FOUR_DIGIT_ZIP_PATTERN, na=False)
             
-            if len(us_customers) > 0:
-                invalid_zips = []
-                fixable_4digit_zips = []
-                
-                # US zip code patterns: 12345 OR 12345-6789
-                zip_pattern = re.compile(r'^\d{5}(-\d{4})?$')
-                four_digit_pattern = re.compile(r'^\d{4}$')
-                
-                for idx, row in us_customers.iterrows():
-                    zip_code = str(row['Default Address Zip']).strip()
-                    # Skip empty/null values
-                    if zip_code == 'nan' or zip_code == '':
-                        continue
-                    
-                    # Check if zip matches valid US format
-                    if not zip_pattern.match(zip_code):
-                        customer_name = f"{row.get('First Name', 'Unknown')} {row.get('Last Name', 'Customer')}"
-                        
-                        # Check if it's a 4-digit zip that can be auto-fixed
-                        if four_digit_pattern.match(zip_code):
-                            fixable_4digit_zips.append({
-                                'row': idx + 2,
-                                'customer': customer_name,
-                                'zip': zip_code,
-                                'fixed_zip': f"0{zip_code}"
-                            })
-                        else:
-                            invalid_zips.append(f"Row {idx + 2}: {customer_name} - '{zip_code}' (must be 5 digits or 5+4 format like '12345-6789')")
+            malformed_positions = malformed.to_numpy().nonzero()[0]
+            error_positions = us_positions[malformed_positions]
+            customer_names = _customer_names(first_names, last_names, error_positions)
+            # tolist() yields plain Python labels, as iterrows() did, rather than NumPy scalars
+            error_labels = df.index[error_positions].tolist()
+            for us_position, idx, customer_name in zip(malformed_positions, error_labels, customer_names):
+                zip_code = zip_strings.iat[us_position]
                 
-                # Handle fixable 4-digit zips
-                if fixable_4digit_zips:
-                    fixable_zip_errors = fixable_4digit_zips
-                    fixable_details = [f"Row {item['row']}: {item['customer']} - '{item['zip']}' → '{item['fixed_zip']}'" 
-                                     for item in fixable_4digit_zips]
-                    errors.append(f"4-digit US zip codes found that can be auto-fixed by adding leading zero:\n" + 
-                                "\n".join(fixable_details))
-                
-                # Handle other invalid zips
-                if invalid_zips:
-                    errors.append(f"Invalid US zip codes found. US zip codes must be 5 digits or 5+4 format (12345 or 12345-6789):\n" + 
-                                "\n".join(invalid_zips))
+                # Check if it's a 4-digit zip that can be auto-fixed
+                if fixable.iat[us_position]:
+                    fixable_4digit_zips.append({
+                        'row': idx + 2,
+                        'customer': customer_name,
+                        'zip': zip_code,
+                        'fixed_zip': f"0{zip_code}"
+                    })
+                else:
+                    invalid_zip_codes.add(zip_code)
+                    invalid_zips.append(f"Row {idx + 2}: {customer_name} - '{zip_code}' (must be 5 digits or 5+4 format like '12345-6789')")
+            
+            # Handle fixable 4-digit zips
+            if fixable_4digit_zips:
+                fixable_zip_errors = fixable_4digit_zips
+                fixable_details = [f"Row {item['row']}: {item['customer']} - '{item['zip']}' → '{item['fixed_zip']}'" 
+                                 for item in fixable_4digit_zips]
+                errors.append("\n".join(["4-digit US zip codes found that can be auto-fixed by adding leading zero:",
+                                         *fixable_details]))
+            
+            # Handle other invalid zips
+            if invalid_zips:
+                errors.append("\n".join(["Invalid US zip codes found. US zip codes must be 5 digits or 5+4 format (12345 or 12345-6789):",
+                                         *invalid_zips]))
         
         # Check US state codes (2 characters for US addresses)
-        if 'Default Address Country Code' in df.columns and 'Default Address Province Code' in df.columns:
-            import re
+        if len(us_positions) and 'Default Address Province Code' in df.columns:
+            invalid_states = []
             
-            # Convert to string and handle nulls
-            country_codes = df['Default Address Country Code'].astype(str).str.upper()
-            province_codes = df['Default Address Province Code'].astype(str)
+            # Normalize each distinct code once (a file holds a few dozen states however many rows it has),
+            # then flag empty/null codes and unknown abbreviations together
+            province_codes = df['Default Address Province Code'].iloc[us_positions]
+            codes, uniques = pd.factorize(province_codes)
+            state_codes = pd.Index(uniques).astype(str).str.strip().str.upper()
+            unique_empty = state_codes.isin(('', 'NAN'))
+            unique_bad = unique_empty | ~state_codes.isin(_US_STATE_CODES)
+            # Missing values factorize to code -1, which picks the appended True flag
+            empty_state = np.append(unique_empty, True)[codes]
+            bad_state = np.append(unique_bad, True)[codes]
             
-            # Find US entries
-            us_mask = country_codes == 'US'
-            us_customers = df[us_mask]
-            
-            if len(us_customers) > 0:
-                invalid_states = []
-                
-                # US state code pattern: exactly 2 uppercase letters
-                state_pattern = re.compile(r'^[A-Z]{2}$')
+            bad_state_positions = bad_state.nonzero()[0]
+            error_positions = us_positions[bad_state_positions]
+            customer_names = _customer_names(first_names, last_names, error_positions)
+            error_labels = df.index[error_positions].tolist()
+            for us_position, idx, customer_name in zip(bad_state_positions, error_labels, customer_names):
                 
-                for idx, row in us_customers.iterrows():
-                    state_code_raw = row['Default Address Province Code']
-                    # Check for truly empty/null values first
-                    if pd.isna(state_code_raw) or str(state_code_raw).strip() == '' or str(state_code_raw).strip().lower() == 'nan':
-                        customer_name = f"{row.get('First Name', 'Unknown')} {row.get('Last Name', 'Customer')}"
-                        invalid_states.append(f"Row {idx + 2}: {customer_name} - Empty state code")
-                        continue
-                    
-                    state_code = str(state_code_raw).strip().upper()
-                    
-                    # Check if state code matches valid US format (2 letters)
-                    if not state_pattern.match(state_code):
-                        customer_name = f"{row.get('First Name', 'Unknown')} {row.get('Last Name', 'Customer')}"
+                if empty_state[us_position]:
+                    invalid_states.append(f"Row {idx + 2}: {customer_name} - Empty state code")
+                else:
+                    state_code = state_codes[codes[us_position]]
+                    if len(state_code) == 2 and state_code.isalpha():
+                        invalid_states.append(f"Row {idx + 2}: {customer_name} - '{state_code}' (unknown US state code; use one like 'CA', 'NY', 'TX')")
+                    else:
                         invalid_states.append(f"Row {idx + 2}: {customer_name} - '{state_code}' (must be 2-letter US state code like 'CA', 'NY', 'TX')")
-                
-                # Handle invalid state codes
-                if invalid_states:
-                    error_count = len(invalid_states)
-                    errors.append(f"Invalid US state codes found ({error_count} issue{'s' if error_count != 1 else ''}). US addresses must have 2-letter state codes (e.g., CA, NY, TX, FL):\n" + 
-                                "\n".join(invalid_states) + 
-                                "\n\nTo fix: Replace with valid 2-letter US state abbreviations. Common examples:\n" +
-                                "• California = CA\n• New York = NY\n• Texas = TX\n• Florida = FL\n• Illinois = IL\n• Pennsylvania = PA")
+            
+            # Handle invalid state codes
+            if invalid_states:
+                error_count = len(invalid_states)
+                # Header, one line per customer, a blank line, then the fix hint, joined in a single pass
+                errors.append("\n".join([f"Invalid US state codes found ({error_count} issue{'s' if error_count != 1 else ''}). US addresses must have 2-letter state codes (e.g., CA, NY, TX, FL):",
+                                         *invalid_states, "", _STATE_CODE_FIX_HINT]))
         
         return {
             'valid': len(errors) == 0,
             'errors': errors,
-            'fixable_zip_errors': fixable_zip_errors
+            'fixable_zip_errors': fixable_zip_errors,
+            'invalid_zips': invalid_zip_codes
         }
     
     def fix_4digit_zip_codes(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -139,36 +181,26 @@ class CustomerToShopifyTransformer:
         if 'Default Address Country Code' not in df.columns or 'Default Address Zip' not in df.columns:
             return df
         
-        import re
-        
         # Create a copy to modify
         fixed_df = df.copy()
         
-        # Convert to string and handle nulls
-        country_codes = fixed_df['Default Address Country Code'].astype(str).str.upper()
-        
         # Find US entries
-        us_mask = country_codes == 'US'
+        us_mask = _us_row_mask(fixed_df['Default Address Country Code'])
         
-        # Pattern to match exactly 4 digits
-        four_digit_pattern = re.compile(r'^\d{4}$')
-        
-        # Fix 4-digit zip codes for US addresses
-        for idx in fixed_df[us_mask].index:
-            zip_code = str(fixed_df.loc[idx, 'Default Address Zip']).strip()
-            
-            # If it's a 4-digit zip, add leading zero
-            if four_digit_pattern.match(zip_code):
-                fixed_df.loc[idx, 'Default Address Zip'] = f"0{zip_code}"
+        # Fix 4-digit zip codes for US addresses by padding them with a leading zero
+        zip_strings = fixed_df['Default Address Zip'].astype(str).str.strip()
+        fixable = us_mask & zip_strings.str.match(_FOUR_DIGIT_ZIP_PATTERN, na=False)
+        if fixable.any():
+            fixed_df['Default Address Zip'] = fixed_df['Default Address Zip'].mask(fixable, zip_strings.str.zfill(5))
         
         return fixed_df
     
     def transform_email_marketing(self, df: pd.DataFrame) -> pd.DataFrame:
         """Transform 'Accepts Email Marketing' column values."""
         if 'Accepts Email Marketing' in df.columns:
-            df['Accepts Email Marketing'] = df['Accepts Email Marketing'].apply(
-                lambda x: 'yes' if x == 1 else 'no'
-            )
+            # Missing values (NaN, None, pd.NA) never equal 1, so they map to 'no'
+            accepts_marketing = df['Accepts Email Marketing'].eq(1).fillna(False).astype(bool)
+            df['Accepts Email Marketing'] = accepts_marketing.map({True: 'yes', False: 'no'})
         return df
     
     def create_tags_column(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -179,7 +211,13 @@ class CustomerToShopifyTransformer:
         # Check Role column - if it contains 'retailer', set Tags to 'Retailer'
         # Note: Is_Retailer column is ignored - only Role column determines tags
         if 'Role' in df.columns:
-            mask_role = (df['Role'].notna()) & (df['Role'].str.lower() == 'retailer')
+            role = df['Role']
+            if isinstance(role.dtype, pd.CategoricalDtype):
+                # Lowercase each distinct category once and match rows by category code
+                categories = role.cat.categories
+                mask_role = role.isin(categories[categories.astype(str).str.lower() == 'retailer'])
+            else:
+                mask_role = (role.notna()) & (role.str.lower() == 'retailer')
             df.loc[mask_role, 'Tags'] = 'Retailer'
         
         return df
@@ -194,7 +232,8 @@ class CustomerToShopifyTransformer:
             'Default Address Country Code'
         ]
         for col in preserve_leading_zero_columns:
-            if col in cleaned_df.columns:
+            # Nullable string columns already hold text; astype(str) would drop their dtype
+            if col in cleaned_df.columns and not isinstance(cleaned_df[col].dtype, pd.StringDtype):
                 cleaned_df[col] = cleaned_df[col].astype(str)
         
         # Clean up any null values in string columns
@@ -203,8 +242,12 @@ class CustomerToShopifyTransformer:
                          'Default Address Country Code']
         for col in string_columns:
             if col in cleaned_df.columns:
+                column = cleaned_df[col]
+                # Categorical columns can only be filled with one of their categories
+                if isinstance(column.dtype, pd.CategoricalDtype) and '' not in column.cat.categories:
+                    column = column.cat.add_categories('')
                 # Convert nan strings back to empty strings
-                cleaned_df[col] = cleaned_df[col].replace('nan', '').fillna('')
+                cleaned_df[col] = column.replace('nan', '').fillna('')
         
         return cleaned_df
     
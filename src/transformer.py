@@ -2,15 +2,38 @@
 WooCommerce to Shopify data transformation module.
 """
 
+import math
+import numpy as np
 import pandas as pd
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from config import SHOPIFY_COLUMNS, REQUIRED_COLUMNS
 
+# Grams per avoirdupois pound, shared by the scalar and column weight conversions
+GRAMS_PER_POUND = 453.592
+
+
+def _pounds_to_grams(weight_lbs: float) -> float:
+    """Convert a parsed weight to grams at four decimals; NaN and infinite weights become 0.0."""
+    grams = round(weight_lbs * GRAMS_PER_POUND, 4)
+    return grams if math.isfinite(grams) else 0.0000
+
+
+# Characters other than word characters, whitespace and hyphens, and runs of whitespace
+_SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s\-]')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+# Runs of hyphens and whitespace, collapsed to one hyphen in handles
+_HANDLE_SEPARATOR_PATTERN = re.compile(r'[-\s]+')
+# Literal "\n" sequences plus every line break character, in a single alternation
+_LINE_BREAK_PATTERN = re.compile(r'\\n|[\n\r\x0b\x0c\x85\u2028\u2029]')
+
 
 class WooCommerceToShopifyTransformer:
     """Transforms WooCommerce product data to Shopify import format."""
     
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = ('shopify_columns', 'required_columns')
+    
     def __init__(self):
         self.shopify_columns = SHOPIFY_COLUMNS
         self.required_columns = REQUIRED_COLUMNS
@@ -26,16 +49,16 @@ class WooCommerceToShopifyTransformer:
         if not text or pd.isna(text):
             return ""
         # Remove special characters except spaces, hyphens, and alphanumeric
-        clean_text = re.sub(r'[^\w\s\-]', '', str(text).strip())
+        clean_text = _SPECIAL_CHARS_PATTERN.sub('', str(text).strip())
         # Remove extra whitespace
-        return re.sub(r'\s+', ' ', clean_text).strip()
+        return _WHITESPACE_PATTERN.sub(' ', clean_text).strip()
     
     def create_handle(self, product_name: str) -> str:
         """Create a URL-friendly handle from product name."""
         if not product_name:
             return ""
-        handle = re.sub(r'[^\w\s-]', '', str(product_name)).strip()
-        return re.sub(r'[-\s]+', '-', handle).lower()
+        handle = _SPECIAL_CHARS_PATTERN.sub('', str(product_name)).strip()
+        return _HANDLE_SEPARATOR_PATTERN.sub('-', handle).lower()
     
     def process_images(self, images_str: str) -> List[str]:
         """Process comma-separated image URLs."""
@@ -45,6 +68,16 @@ class WooCommerceToShopifyTransformer:
     
     def convert_weight_to_grams(self, weight_lbs: Any) -> float:
         """Convert weight from pounds to grams."""
+        # Fast paths for plain numbers and strings, the types CSV columns actually hold
+        value_type = type(weight_lbs)
+        if value_type is float or value_type is int:
+            return _pounds_to_grams(weight_lbs)
+        if value_type is str:
+            try:
+                return _pounds_to_grams(float(weight_lbs)) if weight_lbs.strip() else 0.0000
+            except ValueError:
+                return 0.0000
+        
         # Handle pandas NA first to avoid ambiguity error
         try:
             if pd.isna(weight_lbs):
@@ -64,17 +97,34 @@ class WooCommerceToShopifyTransformer:
             pass
             
         try:
-            return round(float(weight_lbs) * 453.592, 4)
+            return _pounds_to_grams(float(weight_lbs))
         except (ValueError, TypeError):
             return 0.0000
     
+    def convert_weight_series_to_grams(self, weights_lbs: pd.Series) -> np.ndarray:
+        """Convert a whole column of weights from pounds to grams in one vectorized pass.
+        
+        Gives the same result as convert_weight_to_grams for every value: empty, missing,
+        non-numeric, NaN and infinite weights become 0.0.
+        """
+        weights = pd.to_numeric(weights_lbs, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(over='ignore'):  # overflowing weights are zeroed below
+            grams = np.round(weights * GRAMS_PER_POUND, 4)
+        # Present values pandas could not parse ('nan', '1_000', non-ASCII digits) take the scalar path
+        unparsed = (np.isnan(weights) & weights_lbs.notna().to_numpy()).nonzero()[0]
+        if len(unparsed):
+            values = weights_lbs.to_numpy()
+            grams[unparsed] = [self.convert_weight_to_grams(values[position]) for position in unparsed]
+        grams[~np.isfinite(grams)] = 0.0000
+        return grams
+    
     def process_description(self, description: str) -> str:
         """Clean product description by removing line breaks."""
         if not description or pd.isna(description):
             return ""
         desc_str = str(description)
         # Remove literal \n strings, actual newlines, carriage returns, and other line break characters
-        return re.sub(r'\\n|\n|\r|\x0b|\x0c|\x85|\u2028|\u2029', '', desc_str)
+        return _LINE_BREAK_PATTERN.sub('', desc_str)
     
     def process_pricing(self, row: pd.Series) -> tuple[Any, str]:
         """Process sale and regular prices to determine variant price and compare at price."""
@@ -95,8 +145,11 @@ class WooCommerceToShopifyTransformer:
                                           sale_price != regular_price) else None
         return variant_price, compare_at_price if compare_at_price is not None else ''
     
-    def transform_row(self, row: pd.Series) -> Dict[str, Any]:
-        """Transform a single row from WooCommerce format to Shopify format."""
+    def transform_row(self, row: pd.Series, weight_grams: Optional[float] = None) -> Dict[str, Any]:
+        """Transform a single row from WooCommerce format to Shopify format.
+        
+        weight_grams may be passed in when the weight column was already converted in bulk.
+        """
         # Basic product info
         product_name = row.get('Name', '')
         handle = self.create_handle(product_name)
@@ -106,7 +159,8 @@ class WooCommerceToShopifyTransformer:
         images = self.process_images(row.get('Images', ''))
         
         # Weight conversion
-        weight_grams = self.convert_weight_to_grams(row.get('Weight (lbs)', 0))
+        if weight_grams is None:
+            weight_grams = self.convert_weight_to_grams(row.get('Weight (lbs)', 0))
         
         # Published status
         published_val = row.get('Published', 1)
@@ -243,10 +297,13 @@ class WooCommerceToShopifyTransformer:
         # Create empty Shopify DataFrame
         shopify_df = pd.DataFrame(columns=self.shopify_columns)
         
+        # Convert the whole weight column at once instead of once per row
+        weights_grams = self.convert_weight_series_to_grams(df['Weight (lbs)']).tolist()
+        
         # Transform each row
-        for idx, row in df.iterrows():
+        for (idx, row), weight_grams in zip(df.iterrows(), weights_grams):
             # Transform main product row
-            transformed_row = self.transform_row(row)
+            transformed_row = self.transform_row(row, weight_grams)
             
             # Extract images and additional data
             images = transformed_row.pop('images', [])
@@ -1,17 +1,48 @@
 """
 Utility functions for the WooCommerce to Shopify transformer.
+
+Streamlit is imported inside the display helpers so the pure helpers
+(filenames, CSV export) can be imported by scripts and tests without it.
 """
 
-import streamlit as st
 import pandas as pd
 import io
+import functools
 from datetime import datetime
-from version import version_manager
-# from typing import Tuple  # Reserved for future use
+from config import APP_CONFIG
+from version import VersionManager
+from typing import Tuple
+
+
+# Sidebar version buttons: (label, help text, VersionManager method, release notes)
+VERSION_BUTTONS = [
+    ("Patch 🐛", "Bug fixes, small improvements", VersionManager.increment_patch, "Bug fixes and improvements"),
+    ("Minor ✨", "New features, enhancements", VersionManager.increment_minor, "New features and enhancements"),
+    ("Major 🎉", "Breaking changes, major features", VersionManager.increment_major, "Major version release"),
+    ("Build 🔧", "Internal builds", VersionManager.increment_build, None),
+]
+
+
+def _create_version_manager() -> VersionManager:
+    """Create the VersionManager instance shared by the Streamlit app."""
+    return VersionManager()
+
+
+@functools.lru_cache(maxsize=None)
+def _version_manager_resource():
+    """Wrap the VersionManager factory in st.cache_resource on first use."""
+    import streamlit as st
+    return st.cache_resource(_create_version_manager)
+
+
+def get_version_manager() -> VersionManager:
+    """Get the VersionManager shared by all Streamlit sessions in this process."""
+    return _version_manager_resource()()
 
 
 def display_file_info(uploaded_file) -> None:
     """Display information about the uploaded file."""
+    import streamlit as st
     st.header("File Info")
     st.info(f"**Filename:** {uploaded_file.name}")
     st.info(f"**Size:** {uploaded_file.size:,} bytes")
@@ -19,59 +50,56 @@ def display_file_info(uploaded_file) -> None:
 
 def display_transformation_stats(original_df: pd.DataFrame, transformed_df: pd.DataFrame) -> None:
     """Display statistics about the transformation."""
-    col1, col2, col3, col4 = st.columns(4)
+    import streamlit as st
+    columns = transformed_df.columns
     
-    with col1:
-        # Detect data type based on columns
-        if 'Line: Type' in transformed_df.columns:
-            st.metric("Original Orders", len(original_df))
-        elif 'First Name' in transformed_df.columns:
-            st.metric("Original Customers", len(original_df))
-        else:
-            st.metric("Original Products", len(original_df))
+    # Detect data type based on columns
+    if 'Line: Type' in columns:
+        original_metric = ("Original Orders", len(original_df))
+    elif 'First Name' in columns:
+        original_metric = ("Original Customers", len(original_df))
+    else:
+        original_metric = ("Original Products", len(original_df))
     
-    with col2:
-        st.metric("Shopify Rows", len(transformed_df))
+    # Relevant metrics per data type, counted with vectorized column operations
+    if 'Image Src' in columns:
+        # Product data
+        image_src = transformed_df['Image Src']
+        third_metric = ("Products with Images", int((image_src.notna() & image_src.ne('')).sum()))
+    elif 'Line: Type' in columns:
+        # Order data
+        third_metric = ("Fulfilled Orders", int(transformed_df['Fulfillment: Status'].eq('success').sum()))
+    elif 'Email' in columns:
+        # Customer data
+        marketing_enabled = transformed_df['Accepts Email Marketing'].eq('yes').sum() if 'Accepts Email Marketing' in columns else 0
+        third_metric = ("Marketing Enabled", int(marketing_enabled))
+    else:
+        third_metric = ("Valid Records", len(transformed_df))
     
-    with col3:
-        # Display relevant metric based on data type
-        if 'Image Src' in transformed_df.columns:
-            # Product data
-            products_with_images = len([row for _, row in transformed_df.iterrows() if pd.notna(row['Image Src']) and row['Image Src']])
-            st.metric("Products with Images", products_with_images)
-        elif 'Line: Type' in transformed_df.columns:
-            # Order data
-            fulfilled_orders = len([row for _, row in transformed_df.iterrows() if row['Fulfillment: Status'] == 'success'])
-            st.metric("Fulfilled Orders", fulfilled_orders)
-        elif 'Email' in transformed_df.columns:
-            # Customer data
-            marketing_enabled = len([row for _, row in transformed_df.iterrows() if row.get('Accepts Email Marketing', '') == 'yes'])
-            st.metric("Marketing Enabled", marketing_enabled)
-        else:
-            st.metric("Valid Records", len(transformed_df))
+    if 'Status' in columns:
+        # Product data
+        fourth_metric = ("Active Products", int(transformed_df['Status'].eq('active').sum()))
+    elif 'Transaction: Amount' in columns:
+        # Order data
+        total_amount = pd.to_numeric(transformed_df['Transaction: Amount'], errors='coerce').sum()
+        fourth_metric = ("Total Amount", f"${total_amount:,.2f}")
+    elif 'Tags' in columns:
+        # Customer data
+        tags = transformed_df['Tags']
+        fourth_metric = ("Tagged Customers", int((tags.notna() & tags.ne('')).sum()))
+    else:
+        fourth_metric = ("Complete Records", len(transformed_df))
     
-    with col4:
-        # Display relevant metric based on data type
-        if 'Status' in transformed_df.columns:
-            # Product data
-            active_products = len([row for _, row in transformed_df.iterrows() if row['Status'] == 'active'])
-            st.metric("Active Products", active_products)
-        elif 'Transaction: Amount' in transformed_df.columns:
-            # Order data
-            total_amount = sum([float(row['Transaction: Amount']) for _, row in transformed_df.iterrows() if pd.notna(row['Transaction: Amount'])])
-            st.metric("Total Amount", f"${total_amount:,.2f}")
-        elif 'Tags' in transformed_df.columns:
-            # Customer data
-            tagged_customers = len([row for _, row in transformed_df.iterrows() if pd.notna(row.get('Tags', '')) and row.get('Tags', '')])
-            st.metric("Tagged Customers", tagged_customers)
-        else:
-            st.metric("Complete Records", len(transformed_df))
-
-
-def generate_download_filename() -> str:
+    metrics = [original_metric, ("Shopify Rows", len(transformed_df)), third_metric, fourth_metric]
+    for column, (label, value) in zip(st.columns(4), metrics):
+        column.metric(label, value)
+
+
+def generate_download_filename(prefix: str = "shopify_transformed") -> str:
     """Generate a timestamped filename for the output CSV."""
-    current_datetime = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    return f"shopify_transformed_{current_datetime}.csv"
+    # Same YYYY-MM-DD_HH-MM-SS stamp as strftime("%Y-%m-%d_%H-%M-%S")
+    current_datetime = datetime.now().isoformat(timespec='seconds').replace(':', '-').replace('T', '_')
+    return f"{prefix}_{current_datetime}.csv"
 
 
 def dataframe_to_csv_string(df: pd.DataFrame) -> str:
@@ -82,15 +110,23 @@ def dataframe_to_csv_string(df: pd.DataFrame) -> str:
 
 
 def display_preview_section(df: pd.DataFrame, title: str, expanded: bool = False) -> None:
-    """Display a preview section for a DataFrame."""
+    """Display a preview section for a DataFrame.
+    
+    Only the first preview_rows rows are handed to st.dataframe, so the Arrow
+    payload Streamlit serializes per rerun stays small regardless of file size.
+    """
+    import streamlit as st
+    preview_df = df.head(APP_CONFIG['preview_rows'])
     with st.expander(title, expanded=expanded):
-        st.dataframe(df.head(10), use_container_width=True)
+        st.dataframe(preview_df, use_container_width=True)
 
 
 def display_error_message(error: Exception) -> None:
     """Display a formatted error message."""
-    st.error(f"❌ Error processing file: {str(error)}")
-    if "Missing required columns" in str(error):
+    import streamlit as st
+    error_message = str(error)
+    st.error(f"❌ Error processing file: {error_message}")
+    if "Missing required columns" in error_message:
         st.error("Please make sure your CSV file has the expected WooCommerce export format.")
     else:
         st.error("Please check your CSV file format and try again.")
@@ -98,11 +134,13 @@ def display_error_message(error: Exception) -> None:
 
 def display_success_message(message: str) -> None:
     """Display a formatted success message."""
+    import streamlit as st
     st.success(f"✅ {message}")
 
 
 def create_sidebar_instructions(instructions: str) -> None:
     """Create the sidebar with instructions."""
+    import streamlit as st
     with st.sidebar:
         st.header("📋 Instructions")
         st.markdown(instructions)
@@ -114,12 +152,14 @@ def create_sidebar_instructions(instructions: str) -> None:
 
 def display_csv_format_help(format_text: str) -> None:
     """Display help about expected CSV format."""
+    import streamlit as st
     with st.expander("📄 Expected CSV Format", expanded=False):
         st.markdown(format_text)
 
 
 def setup_page_config(title: str, icon: str, layout: str) -> None:
     """Setup Streamlit page configuration."""
+    import streamlit as st
     st.set_page_config(
         page_title=title,
         page_icon=icon,
@@ -127,81 +167,85 @@ def setup_page_config(title: str, icon: str, layout: str) -> None:
     )
 
 
+@functools.lru_cache(maxsize=4)
+def _render_version_html(version_string: str, updated_date: str, release_notes: str) -> Tuple[str, str]:
+    """Build the header and footer version HTML for a given version."""
+    header_html = (
+        f"<div style='text-align: right; margin-top: 20px;'>"
+        f"<span style='color: #666; font-size: 14px;'>{version_string}</span><br>"
+        f"<span style='color: #999; font-size: 12px;'>Updated: {updated_date}</span>"
+        f"</div>"
+    )
+    footer_html = (
+        "<div style='text-align: center; color: #666;'>"
+        "Made for Card Giants • Transform with confidence 🚀<br>"
+        f"<small style='color: #999;'>{version_string} • {release_notes}</small>"
+        "</div>"
+    )
+    return header_html, footer_html
+
+
+def _get_version_html() -> Tuple[str, str]:
+    """Get the cached header and footer version HTML for the current version."""
+    version_block = get_version_manager().get_render_block()
+    return _render_version_html(
+        version_block['version_string'],
+        version_block['updated_date'],
+        version_block['footer_notes']
+    )
+
+
 def display_app_header(title: str, subtitle: str) -> None:
     """Display the main app header with version."""
+    import streamlit as st
     col1, col2 = st.columns([3, 1])
     with col1:
         st.title(title)
         st.markdown(subtitle)
     with col2:
-        version_info = version_manager.get_version_info()
-        version_string = version_manager.get_version_string()
-        st.markdown(
-            f"<div style='text-align: right; margin-top: 20px;'>"
-            f"<span style='color: #666; font-size: 14px;'>{version_string}</span><br>"
-            f"<span style='color: #999; font-size: 12px;'>Updated: {version_info['last_updated'][:10]}</span>"
-            f"</div>",
-            unsafe_allow_html=True
-        )
+        header_html, _ = _get_version_html()
+        st.markdown(header_html, unsafe_allow_html=True)
 
 
 def display_footer() -> None:
     """Display the app footer with version info."""
+    import streamlit as st
     st.markdown("---")
-    version_info = version_manager.get_version_info()
+    _, footer_html = _get_version_html()
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.markdown(
-            "<div style='text-align: center; color: #666;'>"
-            "Made for Card Giants • Transform with confidence 🚀<br>"
-            f"<small style='color: #999;'>{version_manager.get_version_string()} • {version_info.get('release_notes', 'No release notes')}</small>"
-            "</div>",
-            unsafe_allow_html=True
-        )
+        st.markdown(footer_html, unsafe_allow_html=True)
 
 
 def display_version_management() -> None:
     """Display version management section in sidebar."""
+    import streamlit as st
+    version_manager = get_version_manager()
     with st.expander("🏷️ Version Control", expanded=False):
-        version_info = version_manager.get_version_info()
-        current_version = version_manager.get_version_string()
-        
-        st.markdown(f"**Current:** {current_version}")
-        st.markdown(f"**Updated:** {version_info['last_updated'][:16].replace('T', ' ')}")
-        
-        # Version increment buttons
-        col1, col2 = st.columns(2)
+        version_block = version_manager.get_render_block()
         
-        with col1:
-            if st.button("Patch 🐛", help="Bug fixes, small improvements"):
-                version_manager.increment_patch("Bug fixes and improvements")
-                st.success(f"Updated to {version_manager.get_version_string()}")
-                st.rerun()
-            
-            if st.button("Major 🎉", help="Breaking changes, major features"):
-                version_manager.increment_major("Major version release")
-                st.success(f"Updated to {version_manager.get_version_string()}")
-                st.rerun()
+        st.markdown(f"**Current:** {version_block['version_string']}")
+        st.markdown(f"**Updated:** {version_block['updated_minute']}")
         
-        with col2:
-            if st.button("Minor ✨", help="New features, enhancements"):
-                version_manager.increment_minor("New features and enhancements")
-                st.success(f"Updated to {version_manager.get_version_string()}")
-                st.rerun()
-            
-            if st.button("Build 🔧", help="Internal builds"):
-                version_manager.increment_build()
-                st.success(f"Updated to {version_manager.get_version_string()}")
-                st.rerun()
+        # Version increment buttons, laid out two per column
+        columns = st.columns(2)
+        for index, (label, help_text, increment, notes) in enumerate(VERSION_BUTTONS):
+            with columns[index % 2]:
+                if st.button(label, help=help_text):
+                    if notes:
+                        increment(version_manager, notes)
+                    else:
+                        increment(version_manager)
+                    st.success(f"Updated to {version_manager.get_version_string()}")
+                    st.rerun()
         
         # Custom release notes
         release_notes = st.text_area("Release Notes", 
-                                   value=version_info.get('release_notes', ''), 
+                                   value=version_block['release_notes'], 
                                    height=50,
                                    help="Add custom release notes")
         
         if st.button("Update Notes 📝"):
-            version_info['release_notes'] = release_notes
-            version_manager._save_version(version_info)
+            version_manager.update_release_notes(release_notes)
             st.success("Release notes updated!")
             st.rerun()
\ No newline at end of file
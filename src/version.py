@@ -3,13 +3,24 @@ Version management for the WooCommerce to Shopify Transformer application.
 """
 
 import json
+import operator
 import os
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
 
 # Version file path
 VERSION_FILE = os.path.join(os.path.dirname(__file__), '..', 'version.json')
 
+# Version number fields, in display order
+VERSION_FIELDS = operator.itemgetter('major', 'minor', 'patch', 'build')
+
 # Default version structure
 DEFAULT_VERSION = {
     "major": 1,
@@ -25,14 +36,28 @@ class VersionManager:
     """Manages application version information."""
     
     def __init__(self):
+        self._mtime: Optional[float] = None
+        self._version_string_cache: Optional[str] = None
+        self._version_info_cache: Optional[Mapping[str, Any]] = None
+        self._render_block_cache: Optional[Mapping[str, str]] = None
+        # Serializes refreshes, cache fills and read-modify-write cycles when sessions share one instance;
+        # re-entrant because the increment methods refresh and read the version string while holding it
+        self._lock = threading.RLock()
         self.version_data = self._load_version()
     
+    def _get_file_mtime(self) -> Optional[float]:
+        """Get the modification time of the version file, or None if missing."""
+        try:
+            return os.stat(VERSION_FILE).st_mtime
+        except OSError:
+            return None
+    
     def _load_version(self) -> Dict[str, Any]:
         """Load version data from file, create if doesn't exist."""
         try:
             if os.path.exists(VERSION_FILE):
-                with open(VERSION_FILE, 'r') as f:
-                    return json.load(f)
+                self._mtime = self._get_file_mtime()
+                return self._read_version_file()
             else:
                 # Create default version file
                 self._save_version(DEFAULT_VERSION)
@@ -40,58 +65,139 @@ class VersionManager:
         except (json.JSONDecodeError, IOError):
             return DEFAULT_VERSION.copy()
     
+    def _read_version_file(self) -> Dict[str, Any]:
+        """Parse the version file, raising if it is unreadable or not valid JSON."""
+        if orjson is not None:
+            with open(VERSION_FILE, 'rb') as f:
+                return orjson.loads(f.read())
+        with open(VERSION_FILE, 'r') as f:
+            return json.load(f)
+    
     def _save_version(self, version_data: Dict[str, Any]) -> None:
-        """Save version data to file."""
+        """Save version data to file atomically so readers never see a partial write."""
+        temp_file = f"{VERSION_FILE}.tmp"
         try:
-            with open(VERSION_FILE, 'w') as f:
-                json.dump(version_data, f, indent=2)
+            if orjson is not None:
+                with open(temp_file, 'wb') as f:
+                    f.write(orjson.dumps(version_data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(temp_file, 'w') as f:
+                    json.dump(version_data, f, indent=2)
+            os.replace(temp_file, VERSION_FILE)
+            # Record our own write so the next _refresh() doesn't re-read it
+            self._mtime = self._get_file_mtime()
         except IOError:
             pass  # Silently fail if can't save
     
+    def _refresh(self) -> None:
+        """Reload version data only if the version file changed on disk."""
+        with self._lock:
+            mtime = self._get_file_mtime()
+            if mtime is not None and mtime != self._mtime:
+                try:
+                    version_data = self._read_version_file()
+                except (json.JSONDecodeError, IOError):
+                    # Keep the last good version; the file is retried on the next refresh
+                    return
+                self._mtime = mtime
+                self.version_data = version_data
+                self._invalidate_cache()
+    
+    def _invalidate_cache(self) -> None:
+        """Clear cached version views after the version data changes."""
+        self._version_string_cache = None
+        self._version_info_cache = None
+        self._render_block_cache = None
+    
     def get_version_string(self) -> str:
         """Get formatted version string."""
-        return f"v{self.version_data['major']}.{self.version_data['minor']}.{self.version_data['patch']}.{self.version_data['build']}"
+        with self._lock:
+            self._refresh()
+            if self._version_string_cache is None:
+                self._version_string_cache = 'v%d.%d.%d.%d' % VERSION_FIELDS(self.version_data)
+            return self._version_string_cache
+    
+    def get_version_info(self) -> Mapping[str, Any]:
+        """Get a read-only view of the complete version information."""
+        with self._lock:
+            self._refresh()
+            if self._version_info_cache is None:
+                self._version_info_cache = MappingProxyType(self.version_data)
+            return self._version_info_cache
     
-    def get_version_info(self) -> Dict[str, Any]:
-        """Get complete version information."""
-        return self.version_data.copy()
+    def get_render_block(self) -> Mapping[str, str]:
+        """Get the display-ready version fields used by the UI header, footer and sidebar."""
+        # Held across the whole build so every field comes from the same version_data
+        with self._lock:
+            version_string = self.get_version_string()
+            if self._render_block_cache is None:
+                last_updated = self.version_data['last_updated']
+                self._render_block_cache = MappingProxyType({
+                    'version_string': version_string,
+                    'updated_date': last_updated[:10],
+                    'updated_minute': last_updated[:16].replace('T', ' '),
+                    'release_notes': self.version_data.get('release_notes', ''),
+                    # The footer only falls back when the key is missing; empty notes stay blank
+                    'footer_notes': self.version_data.get('release_notes', 'No release notes'),
+                })
+            return self._render_block_cache
+    
+    def update_release_notes(self, release_notes: str) -> None:
+        """Replace the release notes for the current version."""
+        with self._lock:
+            self._refresh()
+            self.version_data['release_notes'] = release_notes
+            self._save_version(self.version_data)
+            self._invalidate_cache()
     
     def increment_patch(self, release_notes: str = "") -> str:
         """Increment patch version."""
-        self.version_data['patch'] += 1
-        self.version_data['last_updated'] = datetime.now().isoformat()
-        if release_notes:
-            self.version_data['release_notes'] = release_notes
-        self._save_version(self.version_data)
-        return self.get_version_string()
+        with self._lock:
+            self._refresh()
+            self.version_data['patch'] += 1
+            self.version_data['last_updated'] = datetime.now().isoformat()
+            if release_notes:
+                self.version_data['release_notes'] = release_notes
+            self._save_version(self.version_data)
+            self._invalidate_cache()
+            return self.get_version_string()
     
     def increment_minor(self, release_notes: str = "") -> str:
         """Increment minor version and reset patch."""
-        self.version_data['minor'] += 1
-        self.version_data['patch'] = 0
-        self.version_data['last_updated'] = datetime.now().isoformat()
-        if release_notes:
-            self.version_data['release_notes'] = release_notes
-        self._save_version(self.version_data)
-        return self.get_version_string()
+        with self._lock:
+            self._refresh()
+            self.version_data['minor'] += 1
+            self.version_data['patch'] = 0
+            self.version_data['last_updated'] = datetime.now().isoformat()
+            if release_notes:
+                self.version_data['release_notes'] = release_notes
+            self._save_version(self.version_data)
+            self._invalidate_cache()
+            return self.get_version_string()
     
     def increment_major(self, release_notes: str = "") -> str:
         """Increment major version and reset minor and patch."""
-        self.version_data['major'] += 1
-        self.version_data['minor'] = 0
-        self.version_data['patch'] = 0
-        self.version_data['last_updated'] = datetime.now().isoformat()
-        if release_notes:
-            self.version_data['release_notes'] = release_notes
-        self._save_version(self.version_data)
-        return self.get_version_string()
+        with self._lock:
+            self._refresh()
+            self.version_data['major'] += 1
+            self.version_data['minor'] = 0
+            self.version_data['patch'] = 0
+            self.version_data['last_updated'] = datetime.now().isoformat()
+            if release_notes:
+                self.version_data['release_notes'] = release_notes
+            self._save_version(self.version_data)
+            self._invalidate_cache()
+            return self.get_version_string()
     
     def increment_build(self) -> str:
         """Increment build number."""
-        self.version_data['build'] += 1
-        self.version_data['last_updated'] = datetime.now().isoformat()
-        self._save_version(self.version_data)
-        return self.get_version_string()
+        with self._lock:
+            self._refresh()
+            self.version_data['build'] += 1
+            self.version_data['last_updated'] = datetime.now().isoformat()
+            self._save_version(self.version_data)
+            self._invalidate_cache()
+            return self.get_version_string()
 
 
 # Global version manager instance
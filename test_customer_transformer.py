@@ -5,6 +5,9 @@ Tests for the CustomerToShopifyTransformer module.
 import unittest
 import sys
 import os
+import time
+import functools
+from types import MappingProxyType
 import pandas as pd
 import numpy as np
 
@@ -13,30 +16,106 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from customer_transformer import CustomerToShopifyTransformer
 
 
-class TestCustomerTransformerValidation(unittest.TestCase):
+def assert_column_equal(column, expected):
+    """Assert that a result column holds the expected values, ignoring dtype and index."""
+    np.testing.assert_array_equal(column.to_numpy(dtype=object), np.array(expected, dtype=object))
+
+
+def strcol(values):
+    """Build a nullable string column, with pd.NA as its missing value."""
+    return pd.array(values, dtype='string')
+
+
+def object_frame(columns):
+    """Build a DataFrame from object arrays, skipping pandas' per-column dtype inference."""
+    return pd.DataFrame({name: np.asarray(values, dtype=object) for name, values in columns.items()})
+
+
+def setUpModule():
+    """Run this module under Copy-on-Write, which is opt-in before pandas 3.0 and always on after."""
+    if int(pd.__version__.split('.')[0]) < 3:
+        previous = pd.get_option('mode.copy_on_write')
+        pd.set_option('mode.copy_on_write', True)
+        unittest.addModuleCleanup(pd.set_option, 'mode.copy_on_write', previous)
+
+
+# Empty input fixture; transform() works on a copy, so one frame serves every run
+_EMPTY_DF = pd.DataFrame()
+
+# Size of the large customer dataset used by the performance tests
+_LARGE_SIZE = 100_000
+
+
+@functools.lru_cache(maxsize=None)
+def _large_customer_frame():
+    """Build the large customer dataset on first use, once per process."""
+    row_numbers = np.arange(_LARGE_SIZE)
+    return pd.DataFrame({
+        # Constant columns as single-category categoricals: one int8 code per row
+        'First Name': pd.Categorical.from_codes(np.zeros(_LARGE_SIZE, dtype=np.int8), categories=['John']),
+        'Last Name': pd.Categorical.from_codes(np.zeros(_LARGE_SIZE, dtype=np.int8), categories=['Doe']),
+        # Digits sized to the largest row number, so np.char works on narrow fixed-width strings
+        'Email': np.char.add(np.char.add('user', row_numbers.astype(f'<U{len(str(_LARGE_SIZE - 1))}')), '@example.com').astype(object),
+        'Accepts Email Marketing': pd.array((row_numbers % 2 == 0).astype(np.int8), dtype='Int8'),
+        'Role': pd.Categorical.from_codes((row_numbers % 3 != 0).astype(np.int8), categories=['retailer', 'customer']),
+        'Is_Retailer': np.where(row_numbers % 3 == 0, 'yes', 'no'),
+        'Phone': pd.Categorical.from_codes(np.zeros(_LARGE_SIZE, dtype=np.int8), categories=['123-456-7890'])
+    })
+
+
+class CustomerTransformerTestCase(unittest.TestCase):
+    """Base class sharing one transformer across every test case in this module."""
+    
+    # The transformer holds no per-call state, so a single instance is safe to reuse
+    transformer = CustomerToShopifyTransformer()
+
+
+class TestCustomerTransformerValidation(CustomerTransformerTestCase):
     """Test cases for customer data validation functionality."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = CustomerToShopifyTransformer()
-        
-        # Complete valid customer data
-        self.valid_data = {
-            'First Name': ['John', 'Jane'],
-            'Last Name': ['Doe', 'Smith'],
-            'Email': ['john@example.com', 'jane@example.com'],
-            'Accepts Email Marketing': [1, 0],
-            'Default Address Company': ['ACME Corp', 'XYZ Inc'],
-            'Default Address Address1': ['123 Main St', '456 Oak Ave'],
-            'Default Address City': ['New York', 'Los Angeles'],
-            'Default Address Province Code': ['NY', 'CA'],
-            'Default Address Country Code': ['US', 'US'],
-            'Phone': ['123-456-7890', '098-765-4321']
-        }
+    # Complete valid customer data, shared read-only by every test in this class
+    _VALID_DATA = MappingProxyType({
+        'First Name': ('John', 'Jane'),
+        'Last Name': ('Doe', 'Smith'),
+        'Email': ('john@example.com', 'jane@example.com'),
+        'Accepts Email Marketing': (1, 0),
+        'Default Address Company': ('ACME Corp', 'XYZ Inc'),
+        'Default Address Address1': ('123 Main St', '456 Oak Ave'),
+        'Default Address City': ('New York', 'Los Angeles'),
+        'Default Address Province Code': ('NY', 'CA'),
+        'Default Address Country Code': ('US', 'US'),
+        'Phone': ('123-456-7890', '098-765-4321')
+    })
+    
+    # The same template as an object-dtype frame
+    _VALID_DF = object_frame(_VALID_DATA)
+    
+    # US zip code cases: (zips, expected valid, expected fixable zips, expected invalid zips)
+    _ZIP_CASES = (
+        (('12345', '67890-1234', '01234'), True, [], set()),  # 5-digit, 5+4, leading zero
+        (('12345-6789', '01234-5678', '99999-0000'), True, [], set()),  # Valid 5+4 formats
+        (('', np.nan), True, [], set()),  # Empty and NaN zip codes are allowed
+        (('1234', '5678'), False, ['1234', '5678'], set()),  # Both 4-digit, fixable
+        # Too short (fixable), too long, incomplete 5+4, too many digits
+        (('1234', '123456', '12345-', '12345-12345'), False, ['1234'], {'123456', '12345-', '12345-12345'}),
+    )
+    
+    def _fresh(self, **overrides):
+        """Copy the valid data frame with the given columns replaced.
+        
+        Rows past the template repeat the first customer, up to the override length.
+        """
+        df = self._VALID_DF
+        template_rows = len(df)
+        row_count = max(map(len, overrides.values()), default=template_rows)
+        if row_count != template_rows:
+            df = df.iloc[list(range(template_rows)) + [0] * (row_count - template_rows)].reset_index(drop=True)
+        # assign() returns a new frame; untouched columns are shared with the template until written
+        return df.assign(**{column: np.array(values, dtype=object) for column, values in overrides.items()})
     
     def test_validate_complete_data(self):
         """Test validation with complete valid data."""
-        df = pd.DataFrame(self.valid_data)
+        df = self._fresh()
         result = self.transformer.validate_dataframe(df)
         
         self.assertTrue(result['valid'])
@@ -44,22 +123,18 @@ class TestCustomerTransformerValidation(unittest.TestCase):
     
     def test_validate_missing_required_columns(self):
         """Test validation with missing required columns."""
-        incomplete_data = self.valid_data.copy()
-        del incomplete_data['First Name']
-        del incomplete_data['Email']
-        
-        df = pd.DataFrame(incomplete_data)
+        df = self._fresh().drop(columns=['First Name', 'Email'])
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
-        self.assertTrue(any('Missing required columns:' in error and 'First Name' in error and 'Email' in error for error in result['errors']))
+        missing_columns_error = result['errors'][0]
+        self.assertIn('Missing required columns:', missing_columns_error)
+        self.assertIn('First Name', missing_columns_error)
+        self.assertIn('Email', missing_columns_error)
     
     def test_validate_empty_emails(self):
         """Test validation with empty email addresses."""
-        data_with_empty_emails = self.valid_data.copy()
-        data_with_empty_emails['Email'] = ['john@example.com', np.nan]
-        
-        df = pd.DataFrame(data_with_empty_emails)
+        df = self._fresh(**{'Email': ['john@example.com', np.nan]})
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
@@ -74,111 +149,71 @@ class TestCustomerTransformerValidation(unittest.TestCase):
             # Missing most required columns
         }
         
-        df = pd.DataFrame(bad_data)
+        df = object_frame(bad_data)
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
         self.assertEqual(len(result['errors']), 2)  # Missing columns + empty email
     
     def test_validate_us_zip_codes(self):
-        """Test validation of US zip codes - both 5 digit and 5+4 formats."""
-        # Valid US zip codes in both formats
-        valid_data = self.valid_data.copy()
-        valid_data['Default Address Country Code'] = ['US', 'US', 'US']
-        valid_data['Default Address Zip'] = ['12345', '67890-1234', '01234']  # 5-digit, 5+4, leading zero
-        # Add third customer data
-        for key in valid_data:
-            if key not in ['Default Address Country Code', 'Default Address Zip']:
-                if len(valid_data[key]) == 2:
-                    valid_data[key].append(valid_data[key][0])
-        
-        df = pd.DataFrame(valid_data)
-        result = self.transformer.validate_dataframe(df)
+        """Test validation of US zip codes - valid, empty, fixable and invalid formats."""
+        for zips, expected_valid, expected_fixable, expected_invalid in self._ZIP_CASES:
+            with self.subTest(zips=zips):
+                df = self._fresh(**{
+                    'Default Address Country Code': ['US'] * len(zips),
+                    'Default Address Zip': zips
+                })
+                
+                result = self.transformer.validate_dataframe(df)
+                
+                self.assertEqual(result['valid'], expected_valid)
+                fixable_errors = result['fixable_zip_errors']
+                self.assertEqual([item['zip'] for item in fixable_errors], expected_fixable)
+                self.assertEqual([item['fixed_zip'] for item in fixable_errors], ['0' + zip_code for zip_code in expected_fixable])
+                self.assertEqual(result['invalid_zips'], expected_invalid)
+                
+                error_text = ' '.join(result['errors'])
+                self.assertEqual('4-digit US zip codes found' in error_text, bool(expected_fixable))
+                self.assertEqual('Invalid US zip codes found' in error_text, bool(expected_invalid))
+    
+    def test_validate_fixable_zip_rows_use_index_labels(self):
+        """Test that fixable zip rows are reported as plain ints from the frame's index labels."""
+        df = self._fresh(**{'Default Address Zip': ['1234', '5678']}).set_axis([10, 3])
         
-        self.assertTrue(result['valid'])
-        self.assertEqual(len(result['errors']), 0)
-    
-    def test_validate_invalid_us_zip_codes(self):
-        """Test validation with invalid US zip codes."""
-        invalid_data = self.valid_data.copy()
-        invalid_data['Default Address Country Code'] = ['US', 'US', 'US', 'US']
-        invalid_data['Default Address Zip'] = ['1234', '123456', '12345-', '12345-12345']  # Too short, too long, incomplete 5+4, too many digits
-        # Add more customer data
-        for key in invalid_data:
-            if key not in ['Default Address Country Code', 'Default Address Zip']:
-                while len(invalid_data[key]) < 4:
-                    invalid_data[key].append(invalid_data[key][0])
-        
-        df = pd.DataFrame(invalid_data)
         result = self.transformer.validate_dataframe(df)
         
-        self.assertFalse(result['valid'])
-        self.assertTrue(any('Invalid US zip codes found' in error for error in result['errors']))
-        # Should mention the invalid zip codes
-        error_text = ' '.join(result['errors'])
-        self.assertIn('1234', error_text)
-        self.assertIn('123456', error_text)
-        self.assertIn('12345-', error_text)
-        self.assertIn('12345-12345', error_text)
+        rows = [item['row'] for item in result['fixable_zip_errors']]
+        self.assertEqual(rows, [12, 5])
+        self.assertEqual({type(row) for row in rows}, {int})
     
     def test_validate_non_us_zip_codes_ignored(self):
         """Test that non-US zip codes are not validated for 5-character rule."""
-        data = self.valid_data.copy()
-        data['Default Address Country Code'] = ['CA', 'UK']
-        data['Default Address Zip'] = ['K1A0A9', 'SW1A1AA']  # Canadian and UK postal codes
+        df = self._fresh(**{
+            'Default Address Country Code': ['CA', 'UK'],
+            'Default Address Zip': ['K1A0A9', 'SW1A1AA']  # Canadian and UK postal codes
+        })
         
-        df = pd.DataFrame(data)
         result = self.transformer.validate_dataframe(df)
         
         self.assertTrue(result['valid'])  # Should pass even with non-5-character codes
     
-    def test_validate_empty_us_zip_codes(self):
-        """Test that empty US zip codes don't trigger validation error."""
-        data = self.valid_data.copy()
-        data['Default Address Country Code'] = ['US', 'US']
-        data['Default Address Zip'] = ['', np.nan]  # Empty and NaN
-        
-        df = pd.DataFrame(data)
-        result = self.transformer.validate_dataframe(df)
-        
-        self.assertTrue(result['valid'])  # Empty/NaN zip codes should be allowed
-    
-    def test_validate_us_extended_zip_codes(self):
-        """Test validation of US extended zip codes (5+4 format)."""
-        data = self.valid_data.copy()
-        data['Default Address Country Code'] = ['US', 'US', 'US']
-        data['Default Address Zip'] = ['12345-6789', '01234-5678', '99999-0000']  # Valid 5+4 formats
-        # Add third customer data
-        for key in data:
-            if key not in ['Default Address Country Code', 'Default Address Zip']:
-                if len(data[key]) == 2:
-                    data[key].append(data[key][0])
-        
+    def test_validate_large_dataset_zip_codes_performance(self):
+        """Test that zip validation of a 10k-row frame stays well within budget."""
+        size = 10_000
+        row_numbers = np.arange(size)
+        data = {key: np.resize(np.array(values, dtype=object), size) for key, values in self._VALID_DATA.items()}
+        data['Default Address Zip'] = np.char.zfill(row_numbers.astype(str), 5)
+        # Every 100th zip lost its leading zero
+        data['Default Address Zip'][::100] = '1234'
         df = pd.DataFrame(data)
-        result = self.transformer.validate_dataframe(df)
         
-        self.assertTrue(result['valid'])
-        self.assertEqual(len(result['errors']), 0)
-    
-    def test_validate_4digit_zip_codes_fixable(self):
-        """Test validation identifies 4-digit zip codes as fixable."""
-        data = self.valid_data.copy()
-        data['Default Address Country Code'] = ['US', 'US']
-        data['Default Address Zip'] = ['1234', '5678']  # Both 4-digit
-        
-        df = pd.DataFrame(data)
+        start = time.perf_counter()
         result = self.transformer.validate_dataframe(df)
+        elapsed = time.perf_counter() - start
         
-        self.assertFalse(result['valid'])  # Should fail validation
-        self.assertTrue('fixable_zip_errors' in result)
-        self.assertEqual(len(result['fixable_zip_errors']), 2)  # Both should be fixable
-        
-        # Check fixable error details
-        fixable_errors = result['fixable_zip_errors']
-        self.assertEqual(fixable_errors[0]['zip'], '1234')
-        self.assertEqual(fixable_errors[0]['fixed_zip'], '01234')
-        self.assertEqual(fixable_errors[1]['zip'], '5678')
-        self.assertEqual(fixable_errors[1]['fixed_zip'], '05678')
+        self.assertEqual(len(result['fixable_zip_errors']), size // 100)
+        self.assertEqual(result['invalid_zips'], set())
+        self.assertLess(elapsed, 5.0)
     
     def test_fix_4digit_zip_codes(self):
         """Test the zip code fixing functionality."""
@@ -209,10 +244,26 @@ class TestCustomerTransformerValidation(unittest.TestCase):
         self.assertTrue(result['valid'])
         self.assertEqual(len(result.get('fixable_zip_errors', [])), 0)
     
+    def test_fix_4digit_zip_codes_large_dataset(self):
+        """Test that 4-digit zip fixing handles a 10k-row frame in one pass."""
+        size = 10_000
+        row_numbers = np.arange(size)
+        zips = np.char.zfill(row_numbers.astype(str), 5).astype(object)
+        # Every 10th zip lost its leading zero; every 20th row is Canadian
+        zips[::10] = '1234'
+        countries = np.where(row_numbers % 20 == 0, 'CA', 'US').astype(object)
+        df = pd.DataFrame({'Default Address Country Code': countries, 'Default Address Zip': zips})
+        
+        fixed_df = self.transformer.fix_4digit_zip_codes(df)
+        
+        expected = zips.copy()
+        expected[(row_numbers % 10 == 0) & (countries == 'US')] = '01234'
+        np.testing.assert_array_equal(fixed_df['Default Address Zip'].to_numpy(dtype=object), expected)
+        # The input frame is left untouched
+        np.testing.assert_array_equal(df['Default Address Zip'].to_numpy(dtype=object), zips)
+    
     def test_csv_output_clean_columns(self):
         """Test that CSV output doesn't contain phantom empty columns."""
-        import io
-        
         data = {
             'First Name': ['John'],
             'Last Name': ['Doe'],
@@ -231,84 +282,44 @@ class TestCustomerTransformerValidation(unittest.TestCase):
         df = pd.DataFrame(data)
         result = self.transformer.transform(df)
         
-        # Convert to CSV string like the app does
-        csv_buffer = io.StringIO()
-        result.to_csv(csv_buffer, index=False)
-        csv_content = csv_buffer.getvalue()
-        
-        # Split into lines and check header
-        lines = csv_content.strip().split('\n')
-        header_line = lines[0] if lines else ''
-        columns = header_line.split(',')
+        # The CSV header is written straight from the column names
+        columns = list(result.columns)
         
         # Verify no empty columns in CSV header
         empty_csv_columns = [col for col in columns if col.strip() == '']
         self.assertEqual(len(empty_csv_columns), 0, f"Found empty columns in CSV: {columns}")
         
         # Verify both Role and Is_Retailer columns are not in CSV output
-        self.assertNotIn('Role', header_line)
-        self.assertNotIn('Is_Retailer', header_line)
+        self.assertNotIn('Role', columns)
+        self.assertNotIn('Is_Retailer', columns)
         
         # Verify expected columns are present
-        self.assertIn('Note', header_line)
-        self.assertIn('Tags', header_line)
+        self.assertIn('Note', columns)
+        self.assertIn('Tags', columns)
 
 
-class TestEmailMarketingTransformation(unittest.TestCase):
+class TestEmailMarketingTransformation(CustomerTransformerTestCase):
     """Test cases for email marketing transformation."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = CustomerToShopifyTransformer()
-    
-    def test_transform_email_marketing_with_ones(self):
-        """Test transforming 1 values to 'yes'."""
-        data = {
-            'First Name': ['John', 'Jane'],
-            'Accepts Email Marketing': [1, 1]
-        }
-        df = pd.DataFrame(data)
-        
-        result = self.transformer.transform_email_marketing(df)
-        
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), ['yes', 'yes'])
-    
-    def test_transform_email_marketing_with_zeros(self):
-        """Test transforming 0 values to 'no'."""
-        data = {
-            'First Name': ['John', 'Jane'],
-            'Accepts Email Marketing': [0, 0]
-        }
-        df = pd.DataFrame(data)
-        
-        result = self.transformer.transform_email_marketing(df)
-        
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), ['no', 'no'])
-    
-    def test_transform_email_marketing_with_null_values(self):
-        """Test transforming null/NaN values to 'no'."""
-        data = {
-            'First Name': ['John', 'Jane', 'Bob'],
-            'Accepts Email Marketing': [np.nan, None, '']
-        }
-        df = pd.DataFrame(data)
-        
-        result = self.transformer.transform_email_marketing(df)
-        
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), ['no', 'no', 'no'])
-    
-    def test_transform_email_marketing_mixed_values(self):
-        """Test transforming mixed values."""
-        data = {
-            'First Name': ['John', 'Jane', 'Bob', 'Alice', 'Charlie'],
-            'Accepts Email Marketing': [1, 0, np.nan, 2, 'yes']
-        }
-        df = pd.DataFrame(data)
-        
-        result = self.transformer.transform_email_marketing(df)
-        
-        expected = ['yes', 'no', 'no', 'no', 'no']
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), expected)
+    # (case, input values, expected output): only a value equal to 1 maps to 'yes'
+    _EMAIL_MARKETING_CASES = (
+        ('ones', [1, 1], ['yes', 'yes']),
+        ('zeros', [0, 0], ['no', 'no']),
+        ('null values', [np.nan, None, ''], ['no', 'no', 'no']),
+        ('string dtype missing values', strcol([pd.NA, pd.NA, '']), ['no', 'no', 'no']),
+        ('int8 dtype', pd.array([1, 0, pd.NA], dtype='Int8'), ['yes', 'no', 'no']),
+        ('mixed values', [1, 0, np.nan, 2, 'yes'], ['yes', 'no', 'no', 'no', 'no']),
+    )
+    
+    def test_transform_email_marketing_values(self):
+        """Test transforming 'Accepts Email Marketing' values across input dtypes."""
+        for case, values, expected in self._EMAIL_MARKETING_CASES:
+            with self.subTest(case=case):
+                df = pd.DataFrame({'Accepts Email Marketing': values})
+                
+                result = self.transformer.transform_email_marketing(df)
+                
+                assert_column_equal(result['Accepts Email Marketing'], expected)
     
     def test_transform_email_marketing_missing_column(self):
         """Test handling when column doesn't exist."""
@@ -324,13 +335,9 @@ class TestEmailMarketingTransformation(unittest.TestCase):
         self.assertNotIn('Accepts Email Marketing', result.columns)
 
 
-class TestTagsColumnCreation(unittest.TestCase):
+class TestTagsColumnCreation(CustomerTransformerTestCase):
     """Test cases for tags column creation based on role."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = CustomerToShopifyTransformer()
-    
     def test_create_tags_from_role_retailer(self):
         """Test creating tags when Role is 'retailer'."""
         data = {
@@ -341,7 +348,7 @@ class TestTagsColumnCreation(unittest.TestCase):
         
         result = self.transformer.create_tags_column(df)
         
-        self.assertEqual(result['Tags'].tolist(), ['Retailer', ''])
+        assert_column_equal(result['Tags'], ['Retailer', ''])
     
     def test_create_tags_from_role_case_insensitive(self):
         """Test that Role check is case insensitive."""
@@ -354,7 +361,19 @@ class TestTagsColumnCreation(unittest.TestCase):
         result = self.transformer.create_tags_column(df)
         
         expected = ['Retailer', 'Retailer', 'Retailer', '']
-        self.assertEqual(result['Tags'].tolist(), expected)
+        assert_column_equal(result['Tags'], expected)
+    
+    def test_create_tags_from_categorical_role(self):
+        """Test that a categorical Role column is matched case-insensitively by category."""
+        data = {
+            'First Name': ['John', 'Jane', 'Bob', 'Alice', 'Charlie'],
+            'Role': pd.Categorical(['RETAILER', 'customer', np.nan, 'rEtAiLeR', 'customer'])
+        }
+        df = pd.DataFrame(data)
+        
+        result = self.transformer.create_tags_column(df)
+        
+        assert_column_equal(result['Tags'], ['Retailer', '', '', 'Retailer', ''])
     
     def test_create_tags_with_role_column(self):
         """Test creating tags with Role column."""
@@ -366,7 +385,7 @@ class TestTagsColumnCreation(unittest.TestCase):
         
         result = self.transformer.create_tags_column(df)
         
-        self.assertEqual(result['Tags'].tolist(), ['Retailer', ''])
+        assert_column_equal(result['Tags'], ['Retailer', ''])
     
     def test_create_tags_with_no_role_column(self):
         """Test creating tags when Role column doesn't exist."""
@@ -379,7 +398,7 @@ class TestTagsColumnCreation(unittest.TestCase):
         result = self.transformer.create_tags_column(df)
         
         # Should create empty tags column
-        self.assertEqual(result['Tags'].tolist(), ['', ''])
+        assert_column_equal(result['Tags'], ['', ''])
     
     def test_create_tags_with_null_role_values(self):
         """Test creating tags with null values in Role column."""
@@ -396,45 +415,59 @@ class TestTagsColumnCreation(unittest.TestCase):
         # Bob: Role='customer' -> ''
         # Alice: Role=None -> ''
         expected = ['Retailer', '', '', '']
-        self.assertEqual(result['Tags'].tolist(), expected)
+        assert_column_equal(result['Tags'], expected)
+    
+    def test_create_tags_with_string_dtype_missing_roles(self):
+        """Test creating tags from a nullable string Role column with pd.NA values."""
+        data = {
+            'First Name': ['John', 'Jane', 'Bob', 'Alice'],
+            'Role': strcol(['retailer', pd.NA, 'customer', pd.NA])
+        }
+        df = pd.DataFrame(data)
+        
+        result = self.transformer.create_tags_column(df)
+        
+        assert_column_equal(result['Tags'], ['Retailer', '', '', ''])
 
 
-class TestCompleteTransformation(unittest.TestCase):
+class TestCompleteTransformation(CustomerTransformerTestCase):
     """Test cases for complete customer data transformation."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = CustomerToShopifyTransformer()
+    @classmethod
+    def setUpClass(cls):
+        """Transform the rows shared by the complete-transformation tests once."""
+        super().setUpClass()
+        # Rows 0-2 feed test_complete_transformation, rows 3-4 test_note_column_and_dropped_columns;
+        # both read slices of a single transform call
+        data = {
+            'First Name': ['John', 'Jane', 'Bob', 'John', 'Jane'],
+            'Last Name': ['Doe', 'Smith', 'Johnson', 'Doe', 'Smith'],
+            'Email': ['john@example.com', 'jane@example.com', 'bob@example.com', 'john@example.com', 'jane@example.com'],
+            'Accepts Email Marketing': pd.array([1, 0, pd.NA, 1, 0], dtype='Int8'),
+            'Role': ['customer', 'retailer', 'retailer', 'retailer', 'customer'],
+            'Phone': ['123-456-7890', '098-765-4321', '555-555-5555', '123-456-7890', '098-765-4321']
+        }
+        cls.shared_result = cls.transformer.transform(pd.DataFrame(data))
     
     def test_complete_transformation(self):
         """Test complete transformation with all features."""
-        data = {
-            'First Name': ['John', 'Jane', 'Bob'],
-            'Last Name': ['Doe', 'Smith', 'Johnson'],
-            'Email': ['john@example.com', 'jane@example.com', 'bob@example.com'],
-            'Accepts Email Marketing': [1, 0, np.nan],
-            'Role': ['customer', 'retailer', 'retailer'],
-            'Phone': ['123-456-7890', '098-765-4321', '555-555-5555']
-        }
-        df = pd.DataFrame(data)
-        
-        result = self.transformer.transform(df)
+        result = self.shared_result.iloc[0:3]
         
         # Check email marketing transformation
         expected_email = ['yes', 'no', 'no']
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), expected_email)
+        assert_column_equal(result['Accepts Email Marketing'], expected_email)
         
         # Check tags creation (based on Role column only)
         expected_tags = ['', 'Retailer', 'Retailer']  # John=customer->'', Jane=retailer->'Retailer', Bob=retailer->'Retailer'
-        self.assertEqual(result['Tags'].tolist(), expected_tags)
+        assert_column_equal(result['Tags'], expected_tags)
         
         # Check that other columns are preserved
-        self.assertEqual(result['First Name'].tolist(), ['John', 'Jane', 'Bob'])
-        self.assertEqual(result['Phone'].tolist(), ['123-456-7890', '098-765-4321', '555-555-5555'])
+        assert_column_equal(result['First Name'], ['John', 'Jane', 'Bob'])
+        assert_column_equal(result['Phone'], ['123-456-7890', '098-765-4321', '555-555-5555'])
         
         # Check that Note column is added
         self.assertIn('Note', result.columns)
-        self.assertEqual(result['Note'].tolist(), ['Imported from WooCommerce', 'Imported from WooCommerce', 'Imported from WooCommerce'])
+        assert_column_equal(result['Note'], ['Imported from WooCommerce', 'Imported from WooCommerce', 'Imported from WooCommerce'])
         
         # Check that both Role and Is_Retailer columns are dropped from final output
         self.assertNotIn('Role', result.columns)
@@ -459,8 +492,8 @@ class TestCompleteTransformation(unittest.TestCase):
         result = self.transformer.transform(df)
         
         # Should handle transformation without errors
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), ['yes'])
-        self.assertEqual(result['Tags'].tolist(), [''])  # Tags column gets created during transformation
+        assert_column_equal(result['Accepts Email Marketing'], ['yes'])
+        assert_column_equal(result['Tags'], [''])  # Tags column gets created during transformation
     
     def test_data_cleaning(self):
         """Test data cleaning functionality."""
@@ -470,40 +503,60 @@ class TestCompleteTransformation(unittest.TestCase):
             'Email': ['john@example.com', 'jane@example.com'],
             'Phone': [np.nan, '123-456-7890']
         }
-        df = pd.DataFrame(data)
+        df = object_frame(data)
         
         result = self.transformer.clean_data(df)
         
         # Null values should be converted to empty strings
-        self.assertEqual(result['First Name'].tolist(), ['John', ''])
-        self.assertEqual(result['Last Name'].tolist(), ['Doe', ''])
-        self.assertEqual(result['Phone'].tolist(), ['', '123-456-7890'])
+        assert_column_equal(result['First Name'], ['John', ''])
+        assert_column_equal(result['Last Name'], ['Doe', ''])
+        assert_column_equal(result['Phone'], ['', '123-456-7890'])
     
-    def test_note_column_and_dropped_columns(self):
-        """Test that Note column is added and Role column is dropped."""
+    def test_data_cleaning_string_dtype(self):
+        """Test that nullable string columns are cleaned in place of their dtype."""
         data = {
-            'First Name': ['John', 'Jane'],
-            'Last Name': ['Doe', 'Smith'],
-            'Email': ['john@example.com', 'jane@example.com'],
-            'Accepts Email Marketing': [1, 0],
-            'Role': ['retailer', 'customer'],  # John=retailer, Jane=customer
-            'Phone': ['123-456-7890', '098-765-4321']
+            'First Name': strcol(['John', pd.NA]),
+            'Email': strcol(['john@example.com', 'jane@example.com']),
+            'Phone': strcol([pd.NA, '0123456789'])
         }
         df = pd.DataFrame(data)
         
-        result = self.transformer.transform(df)
+        result = self.transformer.clean_data(df)
+        
+        assert_column_equal(result['First Name'], ['John', ''])
+        assert_column_equal(result['Phone'], ['', '0123456789'])
+        self.assertEqual(result['First Name'].dtype, pd.StringDtype())
+        self.assertEqual(result['Phone'].dtype, pd.StringDtype())
+    
+    def test_data_cleaning_categorical_columns(self):
+        """Test that missing values in categorical columns are cleaned to empty strings."""
+        data = {
+            'First Name': pd.Categorical(['John', np.nan, 'John']),
+            'Last Name': pd.Categorical(['Doe', 'Smith', np.nan])
+        }
+        df = pd.DataFrame(data)
+        
+        result = self.transformer.clean_data(df)
+        
+        assert_column_equal(result['First Name'].astype(str), ['John', '', 'John'])
+        assert_column_equal(result['Last Name'].astype(str), ['Doe', 'Smith', ''])
+    
+    def test_note_column_and_dropped_columns(self):
+        """Test that Note column is added and Role column is dropped."""
+        # John=retailer, Jane=customer
+        result = self.shared_result.iloc[3:5]
         
         # Check Note column is added with correct value
         self.assertIn('Note', result.columns)
-        self.assertEqual(result['Note'].tolist(), ['Imported from WooCommerce', 'Imported from WooCommerce'])
+        assert_column_equal(result['Note'], ['Imported from WooCommerce', 'Imported from WooCommerce'])
         
         # Check that both Role and Is_Retailer columns are dropped from final output
         self.assertNotIn('Role', result.columns)
         self.assertNotIn('Is_Retailer', result.columns)
         
         # Check that other transformations still work
-        self.assertEqual(result['Accepts Email Marketing'].tolist(), ['yes', 'no'])
-        self.assertEqual(result['Tags'].tolist(), ['Retailer', ''])  # Role-based tagging only
+        assert_column_equal(result['Accepts Email Marketing'], ['yes', 'no'])
+        assert_column_equal(result['Tags'], ['Retailer', ''])  # Role-based tagging only
         
         # Verify no phantom empty columns exist in the final output
         column_names = list(result.columns)
@@ -520,45 +573,49 @@ class TestCompleteTransformation(unittest.TestCase):
     
     def test_preserve_leading_zeros(self):
         """Test that leading zeros are preserved in string fields."""
+        # (zip, phone) pairs with leading zeros, transformed together in one frame
+        cases = [
+            ('01234', '0123456789'),
+            ('00501', '0012345678'),
+            ('02101-0001', '0800123456'),
+            ('00000', '0000000000'),
+            ('90210', '5551234567'),
+        ]
+        zips, phones = map(list, zip(*cases))
+        size = len(cases)
         data = {
-            'First Name': ['John'],
-            'Last Name': ['Doe'],
-            'Email': ['john@example.com'],
-            'Accepts Email Marketing': [1],
-            'Default Address Zip': ['01234'],  # Zip with leading zero
-            'Phone': ['0123456789'],  # Phone with leading zero
-            'Default Address Province Code': ['MA'],
-            'Default Address Country Code': ['US'],
-            'Default Address Company': ['ACME'],
-            'Default Address Address1': ['123 Main St'],
-            'Default Address City': ['Boston']
+            'First Name': ['John'] * size,
+            'Last Name': ['Doe'] * size,
+            'Email': [f'john{i}@example.com' for i in range(size)],
+            'Accepts Email Marketing': [1] * size,
+            'Default Address Zip': zips,
+            'Phone': phones,
+            'Default Address Province Code': ['MA'] * size,
+            'Default Address Country Code': ['US'] * size,
+            'Default Address Company': ['ACME'] * size,
+            'Default Address Address1': ['123 Main St'] * size,
+            'Default Address City': ['Boston'] * size
         }
         df = pd.DataFrame(data)
         
         result = self.transformer.transform(df)
         
         # Check that leading zeros are preserved
-        if 'Default Address Zip' in result.columns:
-            self.assertEqual(result['Default Address Zip'].iloc[0], '01234')
-        if 'Phone' in result.columns:
-            self.assertEqual(result['Phone'].iloc[0], '0123456789')
+        assert_column_equal(result['Default Address Zip'], zips)
+        assert_column_equal(result['Phone'], phones)
 
 
-class TestEdgeCases(unittest.TestCase):
+class TestEdgeCases(CustomerTransformerTestCase):
     """Test cases for edge cases and error handling."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = CustomerToShopifyTransformer()
-    
     def test_empty_dataframe(self):
         """Test transformation with empty dataframe."""
-        df = pd.DataFrame()
-        result = self.transformer.transform(df)
+        result = self.transformer.transform(_EMPTY_DF)
         
         # Should handle empty dataframe gracefully
         self.assertTrue(result.empty)
         self.assertIn('Tags', result.columns)
+        self.assertTrue(_EMPTY_DF.columns.empty)
     
     def test_single_row_dataframe(self):
         """Test transformation with single row."""
@@ -576,54 +633,45 @@ class TestEdgeCases(unittest.TestCase):
         self.assertEqual(result['Tags'].iloc[0], 'Retailer')
     
     def test_large_dataset_performance(self):
-        """Test transformation with larger dataset."""
-        size = 1000
-        data = {
-            'First Name': ['John'] * size,
-            'Last Name': ['Doe'] * size,
-            'Email': [f'user{i}@example.com' for i in range(size)],
-            'Accepts Email Marketing': [1 if i % 2 == 0 else 0 for i in range(size)],
-            'Is_Retailer': ['yes' if i % 3 == 0 else 'no' for i in range(size)],
-            'Phone': ['123-456-7890'] * size
-        }
-        df = pd.DataFrame(data)
+        """Test that transforming a 100k-row dataset stays well within budget."""
+        # transform() works on a copy, so the shared cached frame is never mutated
+        df = _large_customer_frame()
         
+        start = time.perf_counter()
         result = self.transformer.transform(df)
+        elapsed = time.perf_counter() - start
         
-        self.assertEqual(len(result), size)
+        self.assertEqual(len(result), _LARGE_SIZE)
+        self.assertLess(elapsed, 5.0)
         # Check that transformations were applied correctly
-        retailer_count = sum(1 for tag in result['Tags'] if tag == 'Retailer')
-        expected_retailers = sum(1 for i in range(size) if i % 3 == 0)
+        retailer_count = int((result['Tags'].to_numpy() == 'Retailer').sum())
+        # Every third row, starting with row 0, is a retailer
+        expected_retailers = (_LARGE_SIZE + 2) // 3
         self.assertEqual(retailer_count, expected_retailers)
 
 
-class TestUSStateValidation(unittest.TestCase):
+class TestUSStateValidation(CustomerTransformerTestCase):
     """Test cases for US state code validation functionality."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = CustomerToShopifyTransformer()
-        
-        # Base valid customer data
-        self.base_data = {
-            'First Name': ['John', 'Jane', 'Bob', 'Alice'],
-            'Last Name': ['Doe', 'Smith', 'Johnson', 'Wilson'],
-            'Email': ['john@example.com', 'jane@example.com', 'bob@example.com', 'alice@example.com'],
-            'Accepts Email Marketing': [1, 0, 1, 0],
-            'Default Address Company': ['ACME', 'XYZ', 'ABC', 'DEF'],
-            'Default Address Address1': ['123 Main St', '456 Oak Ave', '789 Pine St', '321 Elm St'],
-            'Default Address City': ['Boston', 'New York', 'Miami', 'Seattle'],
-            'Default Address Country Code': ['US', 'US', 'US', 'US'],
-            'Default Address Zip': ['02101', '10001', '33101', '98101'],
-            'Phone': ['123-456-7890', '098-765-4321', '555-555-5555', '444-555-6666']
-        }
+    # Base valid customer data without province codes, shared read-only by every test in this class
+    _BASE_DATA = MappingProxyType({
+        'First Name': ('John', 'Jane', 'Bob', 'Alice'),
+        'Last Name': ('Doe', 'Smith', 'Johnson', 'Wilson'),
+        'Email': ('john@example.com', 'jane@example.com', 'bob@example.com', 'alice@example.com'),
+        'Accepts Email Marketing': (1, 0, 1, 0),
+        'Default Address Company': ('ACME', 'XYZ', 'ABC', 'DEF'),
+        'Default Address Address1': ('123 Main St', '456 Oak Ave', '789 Pine St', '321 Elm St'),
+        'Default Address City': ('Boston', 'New York', 'Miami', 'Seattle'),
+        'Default Address Country Code': ('US', 'US', 'US', 'US'),
+        'Default Address Zip': ('02101', '10001', '33101', '98101'),
+        'Phone': ('123-456-7890', '098-765-4321', '555-555-5555', '444-555-6666')
+    })
+    # Built once; tests derive per-case variants with assign(), which only allocates the replaced columns
+    _BASE_DF = object_frame(_BASE_DATA)
     
     def test_valid_us_state_codes(self):
         """Test validation passes with valid 2-letter US state codes."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['MA', 'NY', 'FL', 'WA']  # All valid
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['MA', 'NY', 'FL', 'WA']})  # All valid
         result = self.transformer.validate_dataframe(df)
         
         self.assertTrue(result['valid'])
@@ -631,38 +679,51 @@ class TestUSStateValidation(unittest.TestCase):
     
     def test_invalid_full_state_names(self):
         """Test validation fails with full state names instead of abbreviations."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['Massachusetts', 'New York', 'FL', 'WA']
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['Massachusetts', 'New York', 'FL', 'WA']})
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
         error_text = ' '.join(result['errors'])
-        self.assertIn('MASSACHUSETTS', error_text)
-        self.assertIn('NEW YORK', error_text)
+        error_tokens = set(error_text.split())
+        self.assertIn("'MASSACHUSETTS'", error_tokens)
+        # Multi-word fragments are checked against the joined text
+        self.assertIn("'NEW YORK'", error_text)
         self.assertIn('must be 2-letter US state code', error_text)
     
     def test_invalid_single_character_states(self):
         """Test validation fails with single character state codes."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['M', 'N', 'FL', 'WA']
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['M', 'N', 'FL', 'WA']})
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
         error_text = ' '.join(result['errors'])
-        self.assertIn('M', error_text)
-        self.assertIn('N', error_text)
+        self.assertLessEqual({"'M'", "'N'"}, set(error_text.split()))
         self.assertIn('must be 2-letter US state code', error_text)
     
+    def test_unknown_two_letter_state_codes(self):
+        """Test validation fails with 2-letter codes that are not US states."""
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['ZZ', 'XX', 'FL', 'WA']})
+        result = self.transformer.validate_dataframe(df)
+        
+        self.assertFalse(result['valid'])
+        error_text = ' '.join(result['errors'])
+        self.assertLessEqual({"'ZZ'", "'XX'"}, set(error_text.split()))
+        self.assertIn('(2 issues)', error_text)
+        self.assertIn('unknown US state code', error_text)
+        self.assertNotIn('must be 2-letter US state code', error_text)
+    
+    def test_us_territory_and_military_state_codes(self):
+        """Test validation passes with DC, territory, freely associated state and military mail codes."""
+        for province_codes in (['DC', 'PR', 'GU', 'AE'], ['FM', 'MH', 'PW', 'UM']):
+            with self.subTest(province_codes=province_codes):
+                df = self._BASE_DF.assign(**{'Default Address Province Code': province_codes})
+                result = self.transformer.validate_dataframe(df)
+                
+                self.assertTrue(result['valid'])
+    
     def test_empty_us_state_codes(self):
         """Test validation fails with empty US state codes."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['MA', '', np.nan, 'WA']
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['MA', '', np.nan, 'WA']})
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
@@ -673,48 +734,40 @@ class TestUSStateValidation(unittest.TestCase):
     
     def test_non_us_addresses_ignored(self):
         """Test that non-US addresses don't trigger state validation."""
-        data = self.base_data.copy()
-        data['Default Address Country Code'] = ['CA', 'UK', 'FR', 'DE']
-        data['Default Address Province Code'] = ['Ontario', 'London', 'Paris', 'Berlin']  # Not 2-letter codes
-        data['Default Address Zip'] = ['K1A0A9', 'SW1A1AA', '75001', '10115']  # Non-US formats
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{
+            'Default Address Country Code': ['CA', 'UK', 'FR', 'DE'],
+            'Default Address Province Code': ['Ontario', 'London', 'Paris', 'Berlin'],  # Not 2-letter codes
+            'Default Address Zip': ['K1A0A9', 'SW1A1AA', '75001', '10115'],  # Non-US formats
+        })
         result = self.transformer.validate_dataframe(df)
         
         self.assertTrue(result['valid'])  # Should pass since no US addresses
     
     def test_mixed_us_and_non_us_addresses(self):
         """Test validation only applies to US addresses in mixed dataset."""
-        data = self.base_data.copy()
-        data['Default Address Country Code'] = ['US', 'CA', 'US', 'UK']
-        data['Default Address Province Code'] = ['Massachusetts', 'Ontario', 'FL', 'London']  # Only US should be validated
-        data['Default Address Zip'] = ['02101', 'K1A0A9', '33101', 'SW1A1AA']
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{
+            'Default Address Country Code': ['US', 'CA', 'US', 'UK'],
+            'Default Address Province Code': ['Massachusetts', 'Ontario', 'FL', 'London'],  # Only US should be validated
+            'Default Address Zip': ['02101', 'K1A0A9', '33101', 'SW1A1AA'],
+        })
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
-        error_text = ' '.join(result['errors'])
-        self.assertIn('MASSACHUSETTS', error_text)  # US address should fail
-        self.assertNotIn('Ontario', error_text)    # Canadian address should be ignored
-        self.assertNotIn('London', error_text)     # UK address should be ignored
+        error_tokens = {token for error in result['errors'] for token in error.split()}
+        self.assertIn("'MASSACHUSETTS'", error_tokens)  # US address should fail
+        # Canadian and UK addresses should be ignored (state codes are reported uppercased)
+        self.assertTrue(error_tokens.isdisjoint({"'ONTARIO'", "'LONDON'"}))
     
     def test_case_insensitive_state_validation(self):
         """Test that state code validation is case insensitive."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['ma', 'NY', 'fl', 'wa']  # Mixed case
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['ma', 'NY', 'fl', 'wa']})  # Mixed case
         result = self.transformer.validate_dataframe(df)
         
         self.assertTrue(result['valid'])  # Should pass with mixed case
     
     def test_state_validation_error_message_format(self):
         """Test that state validation error messages are properly formatted."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['Massachusetts', 'N', '', 'WA']
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['Massachusetts', 'N', '', 'WA']})
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
@@ -741,10 +794,7 @@ class TestUSStateValidation(unittest.TestCase):
     
     def test_state_validation_error_count_singular(self):
         """Test that single state validation error shows singular count."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['Massachusetts', 'NY', 'FL', 'WA']  # Only first one is invalid
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['Massachusetts', 'NY', 'FL', 'WA']})  # Only first one is invalid
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
@@ -763,10 +813,7 @@ class TestUSStateValidation(unittest.TestCase):
     
     def test_state_validation_error_count_plural(self):
         """Test that multiple state validation errors show plural count."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['Massachusetts', 'New York', 'FL', 'WA']  # Two invalid
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['Massachusetts', 'New York', 'FL', 'WA']})  # Two invalid
         result = self.transformer.validate_dataframe(df)
         
         self.assertFalse(result['valid'])
@@ -784,23 +831,16 @@ class TestUSStateValidation(unittest.TestCase):
     
     def test_missing_province_code_column(self):
         """Test handling when Province Code column doesn't exist."""
-        data = self.base_data.copy()
-        if 'Default Address Province Code' in data:
-            del data['Default Address Province Code']  # Remove the column
-        
-        df = pd.DataFrame(data)
-        result = self.transformer.validate_dataframe(df)
+        # The base frame has no province code column
+        result = self.transformer.validate_dataframe(self._BASE_DF)
         
         # Should not crash and should pass other validations
         self.assertTrue(result['valid'])
     
     def test_missing_country_code_column(self):
         """Test handling when Country Code column doesn't exist."""
-        data = self.base_data.copy()
-        data['Default Address Province Code'] = ['MA', 'NY', 'FL', 'WA']
-        del data['Default Address Country Code']  # Remove the column
-        
-        df = pd.DataFrame(data)
+        df = self._BASE_DF.assign(**{'Default Address Province Code': ['MA', 'NY', 'FL', 'WA']})
+        df = df.drop(columns='Default Address Country Code')  # Remove the column
         result = self.transformer.validate_dataframe(df)
         
         # Should not crash and should pass other validations (no US validation to trigger)
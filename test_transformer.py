@@ -6,6 +6,7 @@ import unittest
 import sys
 import os
 import pandas as pd
+import numpy as np
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -15,23 +16,25 @@ from transformer import WooCommerceToShopifyTransformer
 class TestWeightConversion(unittest.TestCase):
     """Test cases for weight conversion functionality."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.transformer = WooCommerceToShopifyTransformer()
+    @classmethod
+    def setUpClass(cls):
+        """Set up the transformer once; the conversion tests never mutate it."""
+        cls.transformer = WooCommerceToShopifyTransformer()
+    
+    # (pounds, expected grams) shared by the scalar and column conversion tests
+    _FOUR_DECIMAL_CASES = (
+        (1.0, 453.5920),      # 1 lb = 453.592 grams
+        (0.5, 226.7960),      # 0.5 lb = 226.796 grams  
+        (2.345, 1063.6732),   # 2.345 lb * 453.592 = 1063.67324 -> rounded to 1063.6732
+        (0.1, 45.3592),       # 0.1 lb = 45.3592 grams
+        (10, 4535.9200),      # 10 lb = 4535.92 grams
+        (0.001, 0.4536),      # 0.001 lb = 0.4536 grams
+        (3.14159, 1425.0001), # 3.14159 lb * 453.592 = 1425.00005 -> rounded to 1425.0001
+    )
     
     def test_convert_weight_to_grams_four_decimal_places(self):
         """Test that weight conversion returns exactly four decimal places."""
-        test_cases = [
-            (1.0, 453.5920),      # 1 lb = 453.592 grams
-            (0.5, 226.7960),      # 0.5 lb = 226.796 grams  
-            (2.345, 1063.6732),   # 2.345 lb * 453.592 = 1063.67324 -> rounded to 1063.6732
-            (0.1, 45.3592),       # 0.1 lb = 45.3592 grams
-            (10, 4535.9200),      # 10 lb = 4535.92 grams
-            (0.001, 0.4536),      # 0.001 lb = 0.4536 grams
-            (3.14159, 1425.0001), # 3.14159 lb * 453.592 = 1425.00005 -> rounded to 1425.0001
-        ]
-        
-        for weight_lbs, expected_grams in test_cases:
+        for weight_lbs, expected_grams in self._FOUR_DECIMAL_CASES:
             with self.subTest(weight_lbs=weight_lbs):
                 result = self.transformer.convert_weight_to_grams(weight_lbs)
                 
@@ -42,11 +45,17 @@ class TestWeightConversion(unittest.TestCase):
                 self.assertAlmostEqual(result, expected_grams, places=4, 
                                      msg=f"Expected {expected_grams} grams for {weight_lbs} lbs, got {result}")
                 
-                # Check that result has exactly 4 decimal places when converted to string
-                result_str = f"{result:.4f}"
-                decimal_places = len(result_str.split('.')[1])
-                self.assertEqual(decimal_places, 4, 
-                               f"Result {result} should have exactly 4 decimal places, got {decimal_places}")
+                # Check that result is already rounded to 4 decimal places
+                self.assertEqual(result, round(result, 4), 
+                               f"Result {result} should be rounded to 4 decimal places")
+    
+    def test_convert_weight_series_four_decimal_places(self):
+        """Test the column conversion against the same cases in a single array comparison."""
+        weights_lbs, expected_grams = map(np.array, zip(*self._FOUR_DECIMAL_CASES))
+        
+        result = self.transformer.convert_weight_series_to_grams(pd.Series(weights_lbs))
+        
+        np.testing.assert_allclose(result, expected_grams, rtol=0, atol=5e-5)
     
     def test_convert_weight_edge_cases(self):
         """Test edge cases for weight conversion."""
@@ -94,6 +103,16 @@ class TestWeightConversion(unittest.TestCase):
                 self.assertAlmostEqual(result, expected_grams, places=4)
                 self.assertIsInstance(result, float)
     
+    def test_convert_weight_series_matches_scalar(self):
+        """Test that the vectorized column conversion agrees with the scalar conversion."""
+        weights = pd.Series([1.0, 0.5, 2.345, 3.14159, '1.5', '5', 0, None, '', pd.NA, 'invalid', 0.00001,
+                             'nan', 'NaN', 'inf', float('nan'), float('inf'), '1_000', '\u0661\u0662', 1e308], dtype=object)
+        
+        result = self.transformer.convert_weight_series_to_grams(weights)
+        
+        self.assertEqual(result.dtype, np.float64)
+        self.assertEqual(result.tolist(), [self.transformer.convert_weight_to_grams(weight) for weight in weights])
+    
     def test_precision_with_very_small_weights(self):
         """Test precision with very small weight values."""
         # Test very small weight that should round to 4 decimal places
@@ -104,10 +123,8 @@ class TestWeightConversion(unittest.TestCase):
         expected = 0.0045
         self.assertAlmostEqual(result, expected, places=4)
         
-        # Verify it has exactly 4 decimal places
-        result_str = f"{result:.4f}"
-        decimal_places = len(result_str.split('.')[1])
-        self.assertEqual(decimal_places, 4)
+        # Verify it is already rounded to 4 decimal places
+        self.assertEqual(result, round(result, 4))
 
 
 if __name__ == '__main__':